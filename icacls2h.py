@@ -25,6 +25,8 @@
 #
 # References:
 #   - https://learn.microsoft.com/en-us/windows-server/administration/windows-commands/icacls
+import functools
+import io
 import logging
 import sys
 import re
@@ -38,6 +40,13 @@ except ImportError:  # PackageNotFoundError is subclass of ImportError
 
 
 # --- Logger Configuration ---
+LOG_LEVEL_PREFIX = {
+    logging.DEBUG: "[+]",
+    logging.INFO: "[*]",
+    logging.WARNING: "[!]",
+}
+
+
 class LoggerFormatter(logging.Formatter):
     def __init__(self, ts=False):
         fmt = "%(prefix)s %(message)s"
@@ -46,15 +55,7 @@ class LoggerFormatter(logging.Formatter):
         logging.Formatter.__init__(self, fmt, None)
 
     def format(self, record):
-        match record.levelno:
-            case logging.DEBUG:
-                record.prefix = "[+]"
-            case logging.INFO:
-                record.prefix = "[*]"
-            case logging.WARNING:
-                record.prefix = "[!]"
-            case _:
-                record.prefix = "[-]"
+        record.prefix = LOG_LEVEL_PREFIX.get(record.levelno, "[-]")
         return logging.Formatter.format(self, record)
 
 
@@ -97,6 +98,10 @@ DACL_ADVANCED_RIGHTS = {
     "WA": "Write attributes",
 }
 
+# Both permission forms share one namespace, so a single lookup table suffices
+assert DACL_BASIC_RIGHTS.keys().isdisjoint(DACL_ADVANCED_RIGHTS)
+DACL_ALL_RIGHTS = DACL_BASIC_RIGHTS | DACL_ADVANCED_RIGHTS
+
 # 3. Inheritance rights may precede either <perm> form:
 DACL_INHERITANCE_RIGHTS = {
     "I": (
@@ -129,24 +134,108 @@ DACL_INHERITANCE_RIGHTS = {
     ),
 }
 
-# We can capture all access rights with the following pattern
-RE_ACE = re.compile(r"\(([\w,]+)\)")
+# Output lines are the same for every occurrence of an ACE, so build them once
+ACE_OUTPUT = {k: f"\t+ ({k}): {v}" for k, v in DACL_ALL_RIGHTS.items()}
+INHERIT_OUTPUT = {
+    k: (f"\t+ ({k}): {name} (dir-only: {dir_only})", f"\t\t{desc!r}")
+    for k, (name, desc, dir_only) in DACL_INHERITANCE_RIGHTS.items()
+}
+
+# We can capture all access rights with the following pattern. ACE identifiers
+# are plain ASCII, so we don't need the unicode-aware character classes.
+RE_ACE = re.compile(r"\(([\w,]+)\)", re.ASCII)
 
+# The identity is everything before the last ':', the DACL everything after it.
+RE_HEADER = re.compile(r"(?P<target>.*):(?P<dacl>[^:]*)")
+# Only the first line may carry the target file in front of the identity.
+# REVISIT: ignore groups with space in their name
+RE_TARGET = re.compile(r"(?P<file>.*)NT (?P<account>[^ ]*)")
 
-def pprint_dacl(name: str, dacl_list: list[str]) -> None:
-    logging.info("%s Rights:", name)
-    logging.debug("Processing DACL list: %s", name)
-    print("ACE Name".ljust(20), "Description")
-    print(("-" * 8).ljust(20), "-" * 11)
-    for ace_id, desc in dacl_list.items():
+
+# Rights tables by the name used in the -list output
+DACL_RIGHTS = {
+    "Basic": DACL_BASIC_RIGHTS,
+    "Advanced": DACL_ADVANCED_RIGHTS,
+    "Inheritance": DACL_INHERITANCE_RIGHTS,
+}
+
+DACL_TABLE_HEADER = "ACE Name".ljust(20) + " Description"
+DACL_TABLE_SEPARATOR = ("-" * 8).ljust(20) + " " + "-" * 11
+
+
+@functools.lru_cache(maxsize=None)
+def format_dacl_table(name: str) -> str:
+    lines = [DACL_TABLE_HEADER, DACL_TABLE_SEPARATOR]
+    for ace_id, desc in DACL_RIGHTS[name].items():
         if isinstance(desc, tuple):
             desc, *_ = desc
-        print(ace_id.ljust(20), desc)
+        lines.append(f"{ace_id:<20} {desc}")
+
+    lines.append("")
+    return "\n".join(lines)
+
 
+def pprint_dacl(name: str) -> None:
+    logging.info("%s Rights:", name)
+    logging.debug("Processing DACL list: %s", name)
+    sys.stdout.write(format_dacl_table(name))
     logging.debug("Finished processing DACL list: %s", name)
     print()
 
 
+def process_line(line: str, state: dict, out) -> None:
+    target_account = None
+    current_dacl_string = line
+    is_first_line = state["first_line"]
+    header = RE_HEADER.fullmatch(line)
+    if header:
+        # output contains at least the identity group
+        target_account, current_dacl_string = header.group("target", "dacl")
+        if is_first_line:
+            target = RE_TARGET.fullmatch(target_account)
+            if target:
+                state["target_file"] = target.group("file").strip()
+                target_account = f"NT {target.group('account')}"
+
+    state["first_line"] = False
+    # access rights only follow the identity, no need to scan the header
+    first_ace = RE_ACE.search(current_dacl_string)
+    if first_ace is not None:
+        if state["target_file"] and is_first_line:
+            logging.info("Target: %s\n", state["target_file"])
+
+        if target_account:
+            logging.info("SID Name: %s", target_account.strip())
+
+        logging.info(f"DACL: {current_dacl_string.strip()!r}")
+        first_perm = True
+        first_inherit = True
+        _get = ACE_OUTPUT.get
+        for match in RE_ACE.finditer(current_dacl_string, first_ace.start()):
+            ace = match.group(1)
+            if ace in INHERIT_OUTPUT:
+                if first_inherit:
+                    logging.info("Inheritance Rights:")
+                    first_inherit = False
+
+                summary, details = INHERIT_OUTPUT[ace]
+                print(summary, file=out)
+                if state["details"]:
+                    print(details, file=out)
+
+            else:
+                if first_perm:
+                    logging.info("Permissions:")
+                    first_perm = False
+
+                for ace_key in ace.split(","):
+                    # won't be a key for inheritance rights
+                    print(_get(ace_key) or f"\t+ ({ace_key}): None", file=out)
+
+        # make space between each DACL
+        print(file=out)
+
+
 if __name__ == "__main__":
     # Setup parser and arguments
     import argparse
@@ -214,88 +303,58 @@ if __name__ == "__main__":
     if TOOL_VERSION and not argv.no_banner:
         print(f"icacls2h v{TOOL_VERSION} - by MatrixEditor\n")
 
-    match argv.list:
-        case "all":
-            pprint_dacl("Basic", DACL_BASIC_RIGHTS)
-            pprint_dacl("Advanced", DACL_ADVANCED_RIGHTS)
-            pprint_dacl("Inheritance", DACL_INHERITANCE_RIGHTS)
-        case "advanced":
-            pprint_dacl("Advanced", DACL_ADVANCED_RIGHTS)
-        case "inheritance":
-            pprint_dacl("Inheritance", DACL_INHERITANCE_RIGHTS)
-        case "basic":
-            pprint_dacl("Basic", DACL_BASIC_RIGHTS)
-
     if argv.list is not None:
+        match argv.list:
+            case "all":
+                pprint_dacl("Basic")
+                pprint_dacl("Advanced")
+                pprint_dacl("Inheritance")
+            case "advanced":
+                pprint_dacl("Advanced")
+            case "inheritance":
+                pprint_dacl("Inheritance")
+            case "basic":
+                pprint_dacl("Basic")
         sys.exit(0)
 
-    if not argv.dacl_string:
-        logging.debug("Reading input from stdin...")
-        try:
-            argv.dacl_string = sys.stdin.read()
-        except KeyboardInterrupt:
-            logging.info(
-                "Unable to read input from stdin. Please specify an input DACL string."
+    # Collect all output (including log records) in a buffer and only write it
+    # to stdout once per DACL instead of flushing on every single line.
+    out = io.StringIO()
+    state = {"first_line": True, "target_file": None, "details": argv.details}
+    if argv.dacl_string:
+        # counting lines walks the whole input, so only do it if it gets logged
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "Processing input DACL string with %s lines.",
+                argv.dacl_string.count("\n") or 1,
             )
-            sys.exit(1)
 
-    logging.debug(
-        "Processing input DACL string with %s lines.", argv.dacl_string.count("\n") or 1
-    )
-    target_file = None
-    is_first_line = True
-    for line in argv.dacl_string.splitlines():
-        ace_list = RE_ACE.findall(line)
-        target_account = None
-        current_dacl_string = line
-        if ":" in line:
-            # output contains at least the identity group
-            target, current_dacl_string = line.rsplit(":", 1)
-            if is_first_line and " " in target:
-                target_file, target_account = target.rsplit(" ", 1)
-                # REVISIT: ignore groups with space in their name
-                if not target_file.endswith("NT"):
-                    target_account = target
-                    target_file = None
-                else:
-                    target_account = f"NT {target_account}"
-                    target_file = target_file.removesuffix("NT").strip()
-            else:
-                target_account = target
-
-        if len(ace_list) > 0:
-            if target_file and is_first_line:
-                logging.info("Target: %s\n", target_file)
-
-            if target_account:
-                logging.info("SID Name: %s", target_account.strip())
-
-            logging.info(f"DACL: {current_dacl_string.strip()!r}")
-            first_perm = True
-            first_inherit = True
-            for ace in ace_list:
-                if ace in DACL_INHERITANCE_RIGHTS:
-                    if first_inherit:
-                        logging.info("Inheritance Rights:")
-                        first_inherit = False
-
-                    name, desc, dir_only = DACL_INHERITANCE_RIGHTS[ace]
-                    print(f"\t+ ({ace}): {name} (dir-only: {dir_only})")
-                    if argv.details:
-                        print(f"\t\t{desc!r}")
-
-                else:
-                    if first_perm:
-                        logging.info("Permissions:")
-                        first_perm = False
-
-                    for ace_key in ace.split(","):
-                        # won't be a key for inheritance rights
-                        desc = DACL_BASIC_RIGHTS.get(ace_key, DACL_ADVANCED_RIGHTS.get(ace_key))
-                        print(f"\t+ ({ace_key}): {desc}")
-
-            # make space between each DACL
-            print()
+        handler.setStream(out)
+        for line in argv.dacl_string.splitlines():
+            process_line(line, state, out)
 
-        if is_first_line:
-            is_first_line = False
+        handler.setStream(sys.stdout)
+        sys.stdout.write(out.getvalue())
+        sys.exit(0)
+
+    # Process stdin as it arrives, so that slowly streaming input (e.g. from
+    # 'icacls /t') is converted right away without holding it in memory.
+    logging.debug("Reading input from stdin...")
+    sys.stdin.reconfigure(errors="replace")
+    handler.setStream(out)
+    try:
+        for line in sys.stdin:
+            process_line(line.rstrip("\r\n"), state, out)
+            if out.tell():
+                sys.stdout.write(out.getvalue())
+                sys.stdout.flush()
+                out.seek(0)
+                out.truncate()
+    except KeyboardInterrupt:
+        handler.setStream(sys.stdout)
+        logging.info(
+            "Unable to read input from stdin. Please specify an input DACL string."
+        )
+        sys.exit(1)
+
+    handler.setStream(sys.stdout)
@@ -15,35 +15,42 @@
 import os
 
 from setuptools import setup
-from subprocess import Popen, call, STDOUT, PIPE
+from subprocess import Popen, PIPE
 
 
 VER_MAJOR = 0
 VER_MINOR = 1
 VER_PREREL = "dev"
-try:
-    if call(["git", "branch"], stderr=STDOUT, stdout=open(os.devnull, "w")) == 0:
-        p = Popen(
-            "git rev-parse --short HEAD",
-            shell=True,
-            stdin=PIPE,
-            stderr=PIPE,
-            stdout=PIPE,
-        )
-        (outstr, __) = p.communicate()
-        VER_CHASH = outstr.strip().decode("utf-8")
-
-        VER_LOCAL = "+{}".format(VER_CHASH)
-    else:
-        VER_LOCAL = ""
-except Exception:
-    VER_LOCAL = ""
 
 
 def local_path(fname):
     return os.path.join(os.path.dirname(__file__), fname)
 
 
+# 'git rev-parse' fails outside of a repository, so there is no need to probe
+# with 'git branch' first. Source trees without git metadata may provide the
+# commit hash in a .git_sha file instead.
+VER_LOCAL = ""
+try:
+    p = Popen(
+        ["git", "rev-parse", "--short", "HEAD"],
+        stdin=PIPE,
+        stderr=PIPE,
+        stdout=PIPE,
+    )
+    (outstr, __) = p.communicate()
+    if p.returncode == 0:
+        VER_LOCAL = "+{}".format(outstr.strip().decode("utf-8"))
+except Exception:
+    pass
+
+if not VER_LOCAL and os.path.exists(local_path(".git_sha")):
+    with open(local_path(".git_sha")) as fp:
+        VER_CHASH = fp.read().strip()
+    if VER_CHASH:
+        VER_LOCAL = "+{}".format(VER_CHASH)
+
+
 setup(
     name="icacls2h",
     version=".".join([str(VER_MAJOR), str(VER_MINOR), VER_PREREL, VER_LOCAL]),